@@ -1,16 +1,64 @@
 #!/usr/bin/env python3
+import argparse
+import ijson
+import queue
 import requests
 import sqlite3
 import time
 import os
 import json
-from collections import defaultdict, Counter
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError
+from urllib3.util.retry import Retry
+
+try:
+    # Optional: vectorized duplicate analysis
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# Number of rows handed to each executemany() call during bulk loading
+BATCH_SIZE = 10000
+
+# Local copy of the last downloaded app list and its HTTP cache validators
+APP_LIST_CACHE = 'steam_apps.json'
+APP_LIST_CACHE_META = APP_LIST_CACHE + '.meta'
+
+# Below this many apps, building the Arrow table costs more than the plain
+# dict loop saves, so the vectorized analysis is only used above it
+ARROW_ANALYSIS_MIN_APPS = 50000
+
+# Errors that can interrupt downloading or parsing the app list
+FETCH_ERRORS = (requests.exceptions.RequestException, HTTPError, ijson.JSONError, OSError)
+
+# Upsert that leaves a row untouched when its name has not changed
+UPSERT_APP_SQL = '''
+INSERT INTO apps (appid, name) VALUES (?, ?)
+ON CONFLICT(appid) DO UPDATE SET
+    name = excluded.name,
+    last_updated = CURRENT_TIMESTAMP
+WHERE name IS NOT excluded.name
+'''
 
 def create_database():
     """Create the SQLite database and table if they don't exist."""
-    conn = sqlite3.connect('steam_db.db')
+    # Autocommit mode: transactions are managed explicitly with BEGIN/COMMIT
+    conn = sqlite3.connect('steam_db.db', isolation_level=None)
     cursor = conn.cursor()
     
+    # Tune SQLite for bulk loading: WAL turns per-commit fsyncs into
+    # sequential log appends, and a larger page cache keeps the B-tree hot
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    
     # Create the apps table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS apps (
@@ -20,57 +68,211 @@ def create_database():
     )
     ''')
     
-    conn.commit()
     return conn, cursor
 
-def fetch_steam_apps():
-    """Fetch the list of all Steam apps from the Steam API."""
+def create_session():
+    """Create an HTTP session with connection pooling and retry/backoff."""
+    session = requests.Session()
+    retries = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retries))
+    return session
+
+class TeeReader:
+    """File-like wrapper that copies everything read from `source` to `sink`."""
+    
+    def __init__(self, source, sink):
+        self.source = source
+        self.sink = sink
+    
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.sink.write(data)
+        return data
+
+def parse_app_list(fileobj):
+    """Incrementally parse a GetAppList response into (appid, name) pairs."""
+    for app in ijson.items(fileobj, 'applist.apps.item'):
+        yield app['appid'], app['name']
+
+def load_cache_validators():
+    """Load the ETag/Last-Modified headers saved with the cached app list."""
+    if not (os.path.exists(APP_LIST_CACHE) and os.path.exists(APP_LIST_CACHE_META)):
+        return {}
+    try:
+        with open(APP_LIST_CACHE_META, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache_validators(response):
+    """Save the response's ETag/Last-Modified headers next to the cache."""
+    validators = {
+        key: response.headers[key]
+        for key in ('ETag', 'Last-Modified')
+        if key in response.headers
+    }
+    with open(APP_LIST_CACHE_META, 'w', encoding='utf-8') as f:
+        json.dump(validators, f)
+
+def fetch_steam_apps(session=None):
+    """Stream (appid, name) pairs for all Steam apps from the Steam API.
+    
+    The response is parsed incrementally with ijson, so the full app list is
+    never materialized as a list of dicts. A copy of the response is kept on
+    disk and revalidated with a conditional GET; when Steam answers
+    304 Not Modified the cached copy is parsed instead of downloading again.
+    
+    Errors are printed and re-raised, so a partial list is never mistaken
+    for the whole one.
+    """
     url = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
+    if session is None:
+        session = create_session()
+    
+    headers = {'Accept-Encoding': 'gzip'}
+    validators = load_cache_validators()
+    if 'ETag' in validators:
+        headers['If-None-Match'] = validators['ETag']
+    if 'Last-Modified' in validators:
+        headers['If-Modified-Since'] = validators['Last-Modified']
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        data = response.json()
-        return data['applist']['apps']
-    except requests.exceptions.RequestException as e:
+        with session.get(url, stream=True, headers=headers) as response:
+            if response.status_code == 304:
+                print("Steam app list not modified, using cached copy.")
+                with open(APP_LIST_CACHE, 'rb') as f:
+                    yield from parse_app_list(f)
+                return
+            
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            
+            # Let urllib3 undo any gzip/deflate transfer encoding for ijson
+            response.raw.decode_content = True
+            
+            # Write the body to the cache while it is being parsed and only
+            # replace the previous copy once the whole list has been read
+            partial_path = APP_LIST_CACHE + '.part'
+            try:
+                with open(partial_path, 'wb') as cache_file:
+                    yield from parse_app_list(TeeReader(response.raw, cache_file))
+            except BaseException:
+                # Don't leave a truncated copy behind
+                try:
+                    os.remove(partial_path)
+                except OSError:
+                    pass
+                raise
+            os.replace(partial_path, APP_LIST_CACHE)
+            save_cache_validators(response)
+    except FETCH_ERRORS as e:
         print(f"Error fetching data from Steam API: {e}")
-        return []
+        raise
+
+def count_apps(apps):
+    """Count app IDs and empty names in a single pass."""
+    # Plain dicts with .get() beat Counter for mostly-unique keys
+    app_id_counts = {}
+    empty_names = 0
+    
+    for app_id, name in apps:
+        app_id_counts[app_id] = app_id_counts.get(app_id, 0) + 1
+        if name == '':
+            empty_names += 1
+    
+    return app_id_counts, empty_names
+
+def analyze_duplicates_arrow(apps):
+    """Analyze duplicates with pyarrow's hash aggregation instead of dicts."""
+    table = pa.table({
+        'appid': pa.array([app_id for app_id, _ in apps], type=pa.int64()),
+        'name': pa.array([name for _, name in apps], type=pa.string())
+    })
+    
+    # Find app IDs that appear multiple times
+    id_counts = table.group_by('appid').aggregate([('appid', 'count')])
+    repeated = id_counts.filter(pc.greater(id_counts['appid_count'], 1))
+    duplicate_ids = dict(zip(repeated['appid'].to_pylist(), repeated['appid_count'].to_pylist()))
+    
+    # Find exact duplicates (same ID and name), grouping only repeated IDs
+    repeated_apps = table.filter(pc.is_in(table['appid'], value_set=repeated['appid']))
+    pair_counts = repeated_apps.group_by(['appid', 'name']).aggregate([('appid', 'count')])
+    repeated = pair_counts.filter(pc.greater(pair_counts['appid_count'], 1))
+    exact_duplicates = dict(zip(
+        zip(repeated['appid'].to_pylist(), repeated['name'].to_pylist()),
+        repeated['appid_count'].to_pylist()
+    ))
+    
+    # Find app IDs with different names (more than one distinct pair per ID).
+    # Pairs are counted by appid, because counting names would skip a null
+    # name ("name": null in the app list) as if it weren't a distinct name.
+    names_per_id = pair_counts.group_by('appid').aggregate([('appid', 'count')])
+    renamed = names_per_id.filter(pc.greater(names_per_id['appid_count'], 1))['appid']
+    renamed_pairs = pair_counts.filter(pc.is_in(pair_counts['appid'], value_set=renamed))
+    different_names = {}
+    for app_id, name in zip(renamed_pairs['appid'].to_pylist(), renamed_pairs['name'].to_pylist()):
+        different_names.setdefault(app_id, []).append(name)
+    
+    return {
+        'unique_ids': id_counts.num_rows,
+        'empty_names': pc.sum(pc.equal(table['name'], '')).as_py() or 0,
+        'duplicate_ids': duplicate_ids,
+        'exact_duplicates': exact_duplicates,
+        'different_names': different_names
+    }
 
 def analyze_duplicates(apps):
-    """Analyze different types of duplicates in the app data."""
-    # Count app IDs
-    app_id_counts = Counter(app['appid'] for app in apps)
+    """Analyze different types of duplicates in the (appid, name) pairs."""
+    if pa is not None and len(apps) >= ARROW_ANALYSIS_MIN_APPS:
+        return analyze_duplicates_arrow(apps)
+    
+    app_id_counts, empty_names = count_apps(apps)
     
     # Find app IDs that appear multiple times
     duplicate_ids = {app_id: count for app_id, count in app_id_counts.items() if count > 1}
     
-    # Group by app ID and name
-    app_id_name_pairs = [(app['appid'], app['name']) for app in apps]
-    app_id_name_counts = Counter(app_id_name_pairs)
+    # Names only matter for app IDs that appear more than once, so pairs are
+    # counted for those few apps only. The (appid, name) tuples from the fetch
+    # are used as keys directly, so nothing is allocated per app.
+    app_id_name_counts = {}
+    if duplicate_ids:
+        for pair in apps:
+            if pair[0] in duplicate_ids:
+                app_id_name_counts[pair] = app_id_name_counts.get(pair, 0) + 1
     
     # Find exact duplicates (same ID and name)
     exact_duplicates = {pair: count for pair, count in app_id_name_counts.items() if count > 1}
     
-    # Group app names by app ID
-    app_id_to_names = defaultdict(set)
-    for app in apps:
-        app_id_to_names[app['appid']].add(app['name'])
-    
     # Find app IDs with different names
-    different_names = {app_id: names for app_id, names in app_id_to_names.items() if len(names) > 1}
+    names_by_id = {}
+    for app_id, name in app_id_name_counts:
+        names_by_id.setdefault(app_id, []).append(name)
+    different_names = {app_id: names for app_id, names in names_by_id.items() if len(names) > 1}
     
     return {
+        'unique_ids': len(app_id_counts),
+        'empty_names': empty_names,
         'duplicate_ids': duplicate_ids,
         'exact_duplicates': exact_duplicates,
         'different_names': different_names
     }
 
-def check_database_state(conn, cursor):
-    """Check the current state of the database."""
-    # Get total count
-    cursor.execute("SELECT COUNT(*) FROM apps")
-    total_count = cursor.fetchone()[0]
+def check_database_state(conn, cursor, total_count=None):
+    """Check the current state of the database.
+    
+    Pass `total_count` when the number of rows is already known to skip the
+    COUNT(*) scan over the whole table.
+    """
+    if total_count is None:
+        # An empty table needs no full count
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM apps)")
+        total_count = 0
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT COUNT(*) FROM apps")
+            total_count = cursor.fetchone()[0]
     
     # Get sample records
     cursor.execute("SELECT appid, name FROM apps LIMIT 5")
@@ -81,86 +283,128 @@ def check_database_state(conn, cursor):
         'sample_records': sample_records
     }
 
+def batched(iterable, size):
+    """Yield lists of up to `size` items from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def prefetch_batches(iterable, size, max_pending=4):
+    """Yield batches of `iterable` while a worker thread produces the next ones.
+    
+    The source (e.g. the streaming download and parse of the app list) runs
+    in a background thread and hands batches over through a bounded queue,
+    so it overlaps with whatever the caller does with each batch.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    done = object()
+    
+    def offer(item):
+        # Give up once the consumer has stopped listening
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for batch in batched(iterable, size):
+                if not offer(batch):
+                    return
+        finally:
+            offer(done)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        producer = executor.submit(produce)
+        try:
+            while True:
+                batch = pending.get()
+                if batch is done:
+                    break
+                yield batch
+            producer.result()  # Re-raise any error from the producer
+        finally:
+            stop.set()
+
 def populate_database(conn, cursor, apps):
-    """Populate the database with the fetched apps."""
-    # Prepare for batch insert
-    app_data = [(app['appid'], app['name']) for app in apps]
+    """Populate the database from an iterable of (appid, name) pairs.
+    
+    Batches are written as they arrive, so a streaming source is downloaded
+    and parsed while earlier batches are being inserted. Returns a tuple of
+    the number of apps read, the number of rows written and the total number
+    of apps in the table afterwards (None if the load failed). If the source
+    fails partway, nothing is written.
+    """
+    # Only write apps that are new or whose name changed since the last run
+    existing = dict(cursor.execute("SELECT appid, name FROM apps"))
+    fetched_count = 0
     
-    # Use a transaction for better performance
+    # Load everything in a single explicit transaction (one journal sync)
     try:
-        cursor.executemany(
-            "INSERT OR REPLACE INTO apps (appid, name) VALUES (?, ?)",
-            app_data
-        )
-        conn.commit()
-        return len(app_data)
+        changes_before = conn.total_changes
+        cursor.execute("BEGIN")
+        for batch in prefetch_batches(apps, BATCH_SIZE):
+            fetched_count += len(batch)
+            changed = []
+            for app_id, name in batch:
+                if app_id not in existing or existing[app_id] != name:
+                    existing[app_id] = name
+                    changed.append((app_id, name))
+            
+            # appid is the rowid, so inserting in key order keeps each batch
+            # from splitting pages at random. The sort is stable, so repeated
+            # app IDs keep their original order and the last name still wins.
+            changed.sort(key=itemgetter(0))
+            cursor.executemany(UPSERT_APP_SQL, changed)
+        cursor.execute("COMMIT")
+        # Only rows that were actually inserted or renamed count as changes.
+        # `existing` now holds every app ID in the table, so it doubles as
+        # the row count.
+        return fetched_count, conn.total_changes - changes_before, len(existing)
     except sqlite3.Error as e:
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         print(f"Database error: {e}")
-        return 0
+        return fetched_count, 0, None
+    except FETCH_ERRORS:
+        # fetch_steam_apps() has already reported the error
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return fetched_count, 0, None
 
 def reset_database(conn, cursor):
-    """Reset the database by dropping and recreating the table."""
+    """Reset the database by removing all apps from the table."""
     try:
-        cursor.execute("DROP TABLE IF EXISTS apps")
-        cursor.execute('''
-        CREATE TABLE apps (
-            appid INTEGER PRIMARY KEY,
-            name TEXT,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        conn.commit()
+        cursor.execute("BEGIN")
+        # An unqualified DELETE uses SQLite's truncate optimization and,
+        # unlike DROP + CREATE, leaves the schema untouched
+        cursor.execute("DELETE FROM apps")
+        cursor.execute("COMMIT")
         print("Database reset successfully.")
     except sqlite3.Error as e:
-        conn.rollback()
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
         print(f"Error resetting database: {e}")
 
-def main():
-    print("Starting Steam app database creation...")
-    
-    # Create or connect to the database
-    conn, cursor = create_database()
-    
-    # Check database state before
-    print("\nChecking database state before fetching data...")
-    before_state = check_database_state(conn, cursor)
-    print(f"Records in database before: {before_state['total_count']}")
-    if before_state['total_count'] > 0:
-        print("Sample records before:")
-        for record in before_state['sample_records']:
-            print(f"  App ID: {record[0]}, Name: '{record[1]}'")
-    
-    # Ask if user wants to reset the database
-    if before_state['total_count'] > 0:
-        reset_choice = input("\nDatabase already contains records. Reset database? (y/n): ")
-        if reset_choice.lower() == 'y':
-            reset_database(conn, cursor)
-    
-    # Fetch apps from Steam API
-    print("\nFetching apps from Steam API...")
-    apps = fetch_steam_apps()
-    
-    if not apps:
-        print("No apps fetched. Exiting.")
-        conn.close()
-        return
-    
-    # After fetching apps
-    unique_app_ids = set(app['appid'] for app in apps)
-    print(f"Total apps fetched: {len(apps)}")
-    print(f"Unique app IDs: {len(unique_app_ids)}")
-    
-    # Analyze duplicates
+def report_duplicates(apps):
+    """Print a duplicate analysis of the apps and return the unique ID count."""
     print("\nAnalyzing duplicates...")
     duplicate_analysis = analyze_duplicates(apps)
+    print(f"Unique app IDs: {duplicate_analysis['unique_ids']}")
     
     # Report on duplicate IDs
     duplicate_ids = duplicate_analysis['duplicate_ids']
     print(f"App IDs that appear multiple times: {len(duplicate_ids)}")
     if duplicate_ids:
         print("\n5 Examples of app IDs that appear multiple times:")
-        for i, (app_id, count) in enumerate(list(duplicate_ids.items())[:5]):
+        for app_id, count in islice(duplicate_ids.items(), 5):
             print(f"App ID {app_id} appears {count} times")
     
     # Report on exact duplicates
@@ -168,7 +412,7 @@ def main():
     print(f"\nExact duplicates (same ID and name): {len(exact_duplicates)}")
     if exact_duplicates:
         print("\n5 Examples of exact duplicates:")
-        for i, ((app_id, name), count) in enumerate(list(exact_duplicates.items())[:5]):
+        for (app_id, name), count in islice(exact_duplicates.items(), 5):
             print(f"App ID {app_id}, Name '{name}' appears {count} times")
     
     # Report on different names
@@ -176,23 +420,74 @@ def main():
     print(f"\nApp IDs with different names: {len(different_names)}")
     if different_names:
         print("\n5 Examples of app IDs with different names:")
-        for i, (app_id, names) in enumerate(list(different_names.items())[:5]):
+        for app_id, names in islice(different_names.items(), 5):
             print(f"App ID {app_id}:")
             for name in names:
                 print(f"  - '{name}'")
             print()
     
-    # Count apps with empty names
-    empty_names = sum(1 for app in apps if app['name'] == '')
-    print(f"Apps with empty names: {empty_names}")
+    # Report on apps with empty names
+    print(f"Apps with empty names: {duplicate_analysis['empty_names']}")
     
-    # Populate the database
-    print(f"\nPopulating database with {len(apps)} apps...")
-    inserted_count = populate_database(conn, cursor, apps)
+    return duplicate_analysis['unique_ids']
+
+def main(analyze=False):
+    print("Starting Steam app database creation...")
+    
+    # Create or connect to the database
+    conn, cursor = create_database()
+    
+    # Check database state before
+    print("\nChecking database state before fetching data...")
+    before_state = check_database_state(conn, cursor)
+    print(f"Records in database before: {before_state['total_count']}")
+    if before_state['total_count'] > 0:
+        print("Sample records before:")
+        for record in before_state['sample_records']:
+            print(f"  App ID: {record[0]}, Name: '{record[1]}'")
+    
+    # Ask if user wants to reset the database
+    if before_state['total_count'] > 0:
+        reset_choice = input("\nDatabase already contains records. Reset database? (y/n): ")
+        if reset_choice.lower() == 'y':
+            reset_database(conn, cursor)
+    
+    # Fetch apps from Steam API and store them as they arrive
+    print("\nFetching apps from Steam API...")
+    with create_session() as session:
+        apps = fetch_steam_apps(session)
+        
+        # The duplicate analysis is purely diagnostic, so it only runs on
+        # request. It needs the whole list up front, which gives up the
+        # overlap between downloading and inserting.
+        unique_app_ids = None
+        if analyze:
+            try:
+                apps = list(apps)
+            except FETCH_ERRORS:
+                apps = []
+            if apps:
+                unique_app_ids = report_duplicates(apps)
+        
+        # Populate the database
+        print("\nPopulating database...")
+        fetched_count, inserted_count, total_count = populate_database(conn, cursor, apps)
+    
+    if not fetched_count:
+        print("No apps fetched. Exiting.")
+        conn.close()
+        return
+    
+    if total_count is None:
+        print("Failed to populate database; no changes were saved.")
+        conn.close()
+        return
+    
+    print(f"Total apps fetched: {fetched_count}")
     
     # Check database state after
     print("\nChecking database state after insertion...")
-    after_state = check_database_state(conn, cursor)
+    after_state = check_database_state(conn, cursor, total_count)
     print(f"Records in database after: {after_state['total_count']}")
     print("Sample records after:")
     for record in after_state['sample_records']:
@@ -201,15 +496,24 @@ def main():
     # Calculate the difference
     records_difference = after_state['total_count'] - before_state['total_count']
     print(f"\nRecords added to database: {records_difference}")
-    print(f"Expected records to add: {len(unique_app_ids)}")
+    if unique_app_ids is not None:
+        print(f"Expected records to add: {unique_app_ids}")
     
     print(f"\nDatabase populated successfully!")
     print(f"Inserted/updated {inserted_count} apps.")
     print(f"Total apps in database: {after_state['total_count']}")
     
     # Close the database connection
+    conn.execute("PRAGMA optimize")
     conn.close()
     print("Database connection closed.")
 
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Fetch the Steam app list and store it in a SQLite database")
+    parser.add_argument("--analyze", action="store_true", help="Analyze and report duplicate apps before populating the database")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_arguments()
+    main(analyze=args.analyze)
@@ -3,16 +3,35 @@ import os
 import json
 import sqlite3
 import tarfile
-import tempfile
+import gzip
+import io
 import logging
 import time
-import datetime
+import calendar
 import shutil
 import argparse
+import ijson
+import multiprocessing
 import re
+import threading
 from pathlib import Path
 from tqdm import tqdm
 
+try:
+    # orjson parses several times faster than the stdlib json module
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    # simdjson parses lazily, so only the fields we read are materialized
+    import simdjson
+    _JSON_ARRAY_TYPES = (list, simdjson.Array)
+except ImportError:
+    simdjson = None
+    _JSON_ARRAY_TYPES = (list,)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,18 +43,350 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Read buffer sizes for the compressed archive and the decompressed stream
+ARCHIVE_READ_BUFFER = 1024 * 1024
+GZIP_READ_BUFFER = 128 * 1024
+
+# Seconds a measured database size is reused for progress logging
+DB_SIZE_MAX_AGE = 5
+
+# Seconds between statistics reports while ingesting
+STATS_INTERVAL = 10
+
+# Number of queued entries written to the database per transaction
+BATCH_SIZE = 10000
+
+# Values outside SQLite's 64-bit INTEGER range can't be bound to a statement
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+# Steam app ids are integers. Keying on INTEGER makes app_id an alias for
+# the rowid, which is smaller and faster to look up than a TEXT key.
+CREATE_GAMES_SQL = '''
+CREATE TABLE IF NOT EXISTS {table} (
+    app_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    first_seen INTEGER,
+    last_seen INTEGER,
+    report_count INTEGER DEFAULT 1
+)
+'''
+
+# Trigram full-text index over game titles, used by the query script for
+# substring searches. It is an external content table over games, and the
+# triggers keep it in sync with later inserts, deletes and renames.
+CREATE_GAMES_FTS_SQL = [
+    '''
+    CREATE VIRTUAL TABLE games_fts USING fts5(
+        title, content='games', content_rowid='app_id', tokenize='trigram'
+    )
+    ''',
+    "INSERT INTO games_fts(games_fts) VALUES ('rebuild')",
+    '''
+    CREATE TRIGGER games_fts_insert AFTER INSERT ON games BEGIN
+        INSERT INTO games_fts(rowid, title) VALUES (new.app_id, new.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER games_fts_delete AFTER DELETE ON games BEGIN
+        INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.app_id, old.title);
+    END
+    ''',
+    '''
+    CREATE TRIGGER games_fts_update AFTER UPDATE OF title ON games BEGIN
+        INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.app_id, old.title);
+        INSERT INTO games_fts(rowid, title) VALUES (new.app_id, new.title);
+    END
+    ''',
+]
+
+# Substring index used instead of games_fts when SQLite lacks FTS5: each
+# title is split into lowercased 3-grams, so a LIKE search only has to check
+# titles that contain every 3-gram of the pattern
+CREATE_GAME_TRIGRAMS_SQL = """
+CREATE TABLE IF NOT EXISTS game_trigrams (
+    tri TEXT NOT NULL,
+    app_id INTEGER NOT NULL,
+    PRIMARY KEY (tri, app_id)
+) WITHOUT ROWID
+"""
+
+# LIKE only folds ASCII letters, so the trigrams must not fold anything else
+ASCII_LOWERCASE = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Row count of games kept up to date by triggers, so the query script can
+# read it instead of running COUNT(*) over the whole table
+CREATE_GAME_STATS_SQL = [
+    "CREATE TABLE game_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT INTO game_stats (name, value) VALUES ('count', (SELECT COUNT(*) FROM games))",
+    '''
+    CREATE TRIGGER game_stats_insert AFTER INSERT ON games BEGIN
+        UPDATE game_stats SET value = value + 1 WHERE name = 'count';
+    END
+    ''',
+    '''
+    CREATE TRIGGER game_stats_delete AFTER DELETE ON games BEGIN
+        UPDATE game_stats SET value = value - 1 WHERE name = 'count';
+    END
+    ''',
+]
+
+# Add a game seen for the first time
+INSERT_GAME_SQL = '''
+INSERT INTO games (app_id, title, first_seen, last_seen, report_count)
+VALUES (?, ?, ?, ?, ?)
+'''
+
+# Fold more reports into a game that is already in the database
+UPDATE_GAME_SQL = '''
+UPDATE games SET
+    first_seen = MIN(COALESCE(first_seen, ?1), COALESCE(?1, first_seen)),
+    last_seen = MAX(COALESCE(last_seen, ?2), COALESCE(?2, last_seen)),
+    report_count = report_count + ?3
+WHERE app_id = ?4
+'''
+
+# Archive and JSON file names: reports_monthX_YYYY.tar.gz or reports_monthX_YYYY.json
+# (where X can be a number and YYYY is the year)
+FILENAME_PATTERN = re.compile(r'reports_([a-z]+)\d*_(\d{4})\.(?:tar\.gz|json)')
+
+# Map abbreviated month names to their numerical values
+MONTH_MAP = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
+    'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+def timestamp_from_name(filename):
+    """Derive a report timestamp from an archive or JSON file name, if possible."""
+    try:
+        match = FILENAME_PATTERN.match(filename)
+        
+        if match:
+            month_name = match.group(1)  # e.g., 'jan', 'feb', etc.
+            
+            if month_name in MONTH_MAP:
+                year = int(match.group(2))
+                month_num = MONTH_MAP[month_name]
+                # Use the 15th day of the month as a default. The date is taken
+                # as UTC, so the result doesn't depend on the local timezone.
+                timestamp = calendar.timegm((year, month_num, 15, 0, 0, 0, 0, 0, 0))
+                logger.info(f"Extracted timestamp from filename: {year:04d}-{month_num:02d}-15 ({timestamp})")
+                return timestamp
+            
+            logger.warning(f"Unknown month name in filename: {month_name}")
+        elif "piiremoved" in filename:
+            # Handle special files like reports_piiremoved.tar.gz
+            # Use current time as a fallback
+            logger.info(f"Using current timestamp for special file: {filename}")
+            return int(time.time())
+        else:
+            logger.warning(f"Filename does not match expected pattern: {filename}")
+    except Exception as e:
+        logger.warning(f"Could not extract timestamp from filename {filename}: {e}")
+    
+    return None
+
+# simdjson parser for the current process. It is created on first use so
+# that every worker process gets its own.
+_parser = None
+
+def parse_json(raw):
+    """Parse raw JSON bytes, lazily with simdjson when it is available.
+    
+    A simdjson document is only valid until the parser is used again, so
+    callers must be done with the result before parsing the next file.
+    """
+    global _parser
+    if simdjson is not None:
+        if _parser is None:
+            _parser = simdjson.Parser()
+        return _parser.parse(raw)
+    return _loads(raw)
+
+def is_json_array(f):
+    """Check whether the JSON document in a binary file is an array, then rewind the file."""
+    head = f.read(4096).lstrip()
+    f.seek(0)
+    return head.startswith(b'[')
+
+def title_trigrams(title):
+    """Return the set of case-folded 3-character substrings of a title."""
+    folded = title.translate(ASCII_LOWERCASE)
+    return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+
+def entry_to_row(entry_data, timestamp=None):
+    """Pick the (app_id, title, timestamp) of a single JSON entry.
+    
+    Returns None if the entry lacks the data needed to be recorded or has
+    values that can't be stored. Entries are checked one at a time here
+    because a single bad row would make the whole batch's executemany() fail.
+    """
+    try:
+        # Extract app info
+        app_info = entry_data.get("app", {})
+        steam_info = app_info.get("steam", {})
+        
+        app_id = steam_info.get("appId")
+        title = app_info.get("title")
+        
+        # Skip if missing essential data
+        if not app_id or not title:
+            return None
+        
+        # Use the entry's timestamp if available, otherwise use the provided one
+        entry_timestamp = entry_data.get("timestamp", timestamp)
+        
+        # Skip ids that aren't numeric, they can't be Steam apps
+        try:
+            app_id = int(app_id)
+        except (TypeError, ValueError):
+            return None
+        if not -SQLITE_MAX_INT <= app_id <= SQLITE_MAX_INT:
+            return None
+        
+        # Skip values SQLite can't bind or that can't be compared when
+        # folding reports together
+        if not isinstance(title, str):
+            return None
+        if entry_timestamp is not None:
+            if isinstance(entry_timestamp, bool) or not isinstance(entry_timestamp, (int, float)):
+                return None
+            if isinstance(entry_timestamp, int) and not -SQLITE_MAX_INT <= entry_timestamp <= SQLITE_MAX_INT:
+                return None
+        
+        return (app_id, title, entry_timestamp)
+        
+    except Exception as e:
+        logger.error(f"Error processing entry: {e}")
+        return None
+
+def iter_document(raw, timestamp):
+    """Parse a JSON document and yield a row (or None) for every entry in it.
+    
+    Only plain rows leave this generator, so nothing refers into a simdjson
+    document once it is exhausted and the parser can be reused.
+    """
+    data = parse_json(raw)
+    
+    # Handle both single entries and lists of entries
+    entries = data if isinstance(data, _JSON_ARRAY_TYPES) else (data,)
+    for entry in entries:
+        yield entry_to_row(entry, timestamp)
+
+def iter_archive(archive_path, timestamp):
+    """Yield a row (or None) for every entry in every JSON file of a tar.gz archive."""
+    # Stream the archive member by member instead of extracting it to
+    # disk first. Decompression is done by GzipFile behind large read
+    # buffers, which is much faster than tarfile's own "r|gz" stream
+    # and its 10 KB reads.
+    json_file_count = 0
+    with open(archive_path, "rb", buffering=ARCHIVE_READ_BUFFER) as archive_file, \
+            gzip.GzipFile(fileobj=archive_file) as gz, \
+            tarfile.open(fileobj=io.BufferedReader(gz, buffer_size=GZIP_READ_BUFFER), mode="r|") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.endswith(".json"):
+                continue
+            
+            json_file_count += 1
+            try:
+                with tar.extractfile(member) as f:
+                    raw = f.read()
+                
+                yield from iter_document(raw, timestamp)
+            except ValueError:
+                logger.warning(f"Invalid JSON in file: {member.name}")
+            except Exception as e:
+                logger.error(f"Error processing file {member.name}: {e}")
+    
+    logger.info(f"Processed {json_file_count} JSON files from archive")
+
+def iter_json_file(json_path, timestamp):
+    """Yield a row (or None) for every entry in a standalone JSON file."""
+    with open(json_path, 'rb') as f:
+        if not is_json_array(f):
+            yield from iter_document(f.read(), timestamp)
+            return
+        
+        # Lists (such as the large piiremoved dump) are streamed with ijson,
+        # so the whole document never has to be held in memory. The progress
+        # bar only checks the clock every 10,000 entries, so it costs next to
+        # nothing per entry.
+        entries = ijson.items(f, 'item', use_float=True)
+        for i, entry in enumerate(tqdm(entries, desc=f"Processing {json_path.name}", unit="entries",
+                                       mininterval=0.5, miniters=10000, smoothing=0), 1):
+            yield entry_to_row(entry, timestamp)
+            
+            if i % 10000 == 0:
+                logger.info(f"Processed {i} entries from {json_path.name}")
+
+def aggregate_rows(rows, games):
+    """Fold rows into a dict of app_id -> [title, first_seen, last_seen, count].
+    
+    Collapsing repeated reports for a game here means each game is written
+    once instead of once per report. Returns the number of entries seen.
+    """
+    entries_processed = 0
+    for row in rows:
+        entries_processed += 1
+        if row is None:
+            continue
+        
+        app_id, title, timestamp = row
+        game = games.get(app_id)
+        if game is None:
+            # The first title seen for a game is the one that is kept
+            games[app_id] = [title, timestamp, timestamp, 1]
+        else:
+            if timestamp is not None:
+                if game[1] is None or timestamp < game[1]:
+                    game[1] = timestamp
+                if game[2] is None or timestamp > game[2]:
+                    game[2] = timestamp
+            game[3] += 1
+    
+    return entries_processed
+
+def read_reports(path):
+    """Read all reports from a tar.gz archive or standalone JSON file.
+    
+    This does not touch the database and can run in worker processes, so it
+    only returns plain data: a tuple of (path, games, entries processed),
+    where games is aggregated as in aggregate_rows(). Games is None if the
+    file could not be read.
+    """
+    read_start_time = time.time()
+    logger.info(f"Reading {path}")
+    
+    try:
+        timestamp = timestamp_from_name(path.name)
+        source = iter_archive if path.name.endswith(".tar.gz") else iter_json_file
+        
+        games = {}
+        entries_processed = aggregate_rows(source(path, timestamp), games)
+        
+        logger.info(f"Read {entries_processed} entries from {path.name} in {time.time() - read_start_time:.2f} seconds")
+        return path, games, entries_processed
+        
+    except Exception as e:
+        logger.error(f"Error processing {path}: {e}")
+        return path, None, 0
+
 class ProtonDBExtractor:
-    def __init__(self, archive_dir="reports", db_path="protondb_games.db", remove_json=False):
+    def __init__(self, archive_dir="reports", db_path="protondb_games.db", remove_json=False, workers=None):
         """Initialize the extractor with paths to archives and database."""
         self.archive_dir = Path(archive_dir)
         self.db_path = Path(db_path)
         self.conn = None
         self.cursor = None
-        self.processed_games = set()  # Track processed games to avoid duplicates
+        self._known_ids = set()  # app_ids already in the database
+        self._db_size_cache = (0, 0)  # (time measured, size in MB) from get_db_size()
         self.remove_json = remove_json  # Whether to remove JSON files after processing
+        self.workers = workers or os.cpu_count() or 1  # Processes used to read archives
         self.start_time = time.time()
         
-        # Statistics
+        # Statistics, shared with the thread that logs them periodically
+        self._stats_lock = threading.Lock()
         self.stats = {
             "total_archives": 0,
             "total_json_files": 0,
@@ -47,11 +398,23 @@ class ProtonDBExtractor:
             "processing_time": 0
         }
 
-    def get_db_size(self):
-        """Get the size of the database file in MB."""
-        if self.db_path.exists():
-            return round(self.db_path.stat().st_size / (1024 * 1024), 2)
-        return 0
+    def get_db_size(self, max_age=0):
+        """Get the size of the database file (including its WAL) in MB.
+        
+        A size measured less than max_age seconds ago is reused.
+        """
+        measured_at, size = self._db_size_cache
+        if time.time() - measured_at < max_age:
+            return size
+        
+        size = 0
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            if path.exists():
+                size += path.stat().st_size
+        size = round(size / (1024 * 1024), 2)
+        
+        self._db_size_cache = (time.time(), size)
+        return size
 
     def print_stats(self, title="Current Statistics"):
         """Print current statistics."""
@@ -60,56 +423,67 @@ class ProtonDBExtractor:
         minutes, seconds = divmod(remainder, 60)
         
         # Get current database size
-        current_db_size = self.get_db_size()
+        current_db_size = self.get_db_size(max_age=DB_SIZE_MAX_AGE)
         
-        # Get current count of games in database
-        self.cursor.execute("SELECT COUNT(*) FROM games")
-        current_game_count = self.cursor.fetchone()[0]
+        # Take a consistent snapshot, this may run in the stats thread.
+        # write_games() updates the known set and the game counters together
+        # under the lock once per committed batch. Every game in the database
+        # is in the known set, so its size is the row count without a full
+        # table scan.
+        with self._stats_lock:
+            stats = dict(self.stats)
+            current_game_count = len(self._known_ids)
         
         logger.info(f"\n{'=' * 50}")
         logger.info(f"{title}")
         logger.info(f"{'=' * 50}")
         logger.info(f"Time elapsed: {int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}")
-        logger.info(f"Archives processed: {self.stats['processed_archives']} / {self.stats['total_archives']}")
-        logger.info(f"JSON files processed: {self.stats['processed_json_files']} / {self.stats['total_json_files']}")
-        logger.info(f"Entries processed: {self.stats['total_entries_processed']}")
+        logger.info(f"Archives processed: {stats['processed_archives']} / {stats['total_archives']}")
+        logger.info(f"JSON files processed: {stats['processed_json_files']} / {stats['total_json_files']}")
+        logger.info(f"Entries processed: {stats['total_entries_processed']}")
         logger.info(f"Games in database: {current_game_count}")
-        logger.info(f"New games added: {self.stats['total_games_added']}")
-        logger.info(f"Existing games updated: {self.stats['total_games_updated']}")
+        logger.info(f"New games added: {stats['total_games_added']}")
+        logger.info(f"Existing games updated: {stats['total_games_updated']}")
         logger.info(f"Database size: {current_db_size} MB")
-        if self.stats['db_size_before'] > 0:
-            size_change = current_db_size - self.stats['db_size_before']
+        if stats['db_size_before'] > 0:
+            size_change = current_db_size - stats['db_size_before']
             logger.info(f"Database growth: {size_change:.2f} MB")
         logger.info(f"{'=' * 50}\n")
 
+    def report_stats_periodically(self, stop_event):
+        """Print statistics every STATS_INTERVAL seconds until stop_event is set."""
+        while not stop_event.wait(STATS_INTERVAL):
+            self.print_stats()
+
     def setup_database(self):
         """Create the SQLite database and required tables if they don't exist."""
         try:
             # Record initial database size
             self.stats['db_size_before'] = self.get_db_size()
             
-            self.conn = sqlite3.connect(self.db_path)
+            # Autocommit mode: transactions are managed explicitly with BEGIN/COMMIT
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None)
             self.cursor = self.conn.cursor()
             
-            # Create games table
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS games (
-                app_id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                first_seen INTEGER,
-                last_seen INTEGER,
-                report_count INTEGER DEFAULT 1
-            )
-            ''')
+            # Tune SQLite for bulk ingest. The input can always be re-read, so
+            # trading some durability for fewer fsyncs is safe here.
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+            self.cursor.execute("PRAGMA synchronous=NORMAL")
+            self.cursor.execute("PRAGMA temp_store=MEMORY")
+            self.cursor.execute("PRAGMA cache_size=-262144")  # 256 MB
+            self.cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+            # locking_mode is left at NORMAL: with EXCLUSIVE the query script
+            # couldn't read the database until the extractor exits
             
-            # Create an index on title for faster searches
-            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_title ON games(title)')
+            # Create games table
+            self.cursor.execute(CREATE_GAMES_SQL.format(table="games"))
+            self.migrate_app_ids()
             
-            # Get initial count of games in database
-            self.cursor.execute("SELECT COUNT(*) FROM games")
-            initial_game_count = self.cursor.fetchone()[0]
+            # Load the games that are already stored, so that every entry can
+            # be sorted into an insert or an update without a query
+            self._known_ids = {row[0] for row in self.cursor.execute("SELECT app_id FROM games")}
+            initial_game_count = len(self._known_ids)
             
-            self.conn.commit()
             logger.info(f"Database setup complete at {self.db_path}")
             logger.info(f"Initial database size: {self.stats['db_size_before']} MB")
             logger.info(f"Initial game count: {initial_game_count}")
@@ -118,6 +492,101 @@ class ProtonDBExtractor:
             logger.error(f"Database error: {e}")
             raise
 
+    def migrate_app_ids(self):
+        """Convert a games table from older versions, keyed by TEXT app_id, to INTEGER keys."""
+        columns = {row[1]: row[2] for row in self.cursor.execute("PRAGMA table_info(games)")}
+        if columns.get("app_id", "").upper() != "TEXT":
+            return
+        
+        logger.info("Migrating games table to integer app_ids")
+        migrate_start_time = time.time()
+        
+        self.cursor.execute("BEGIN")
+        self.cursor.execute("DROP TABLE IF EXISTS games_new")
+        self.cursor.execute(CREATE_GAMES_SQL.format(table="games_new"))
+        # Non-numeric ids could never be real Steam apps, so they are dropped
+        self.cursor.execute('''
+        INSERT INTO games_new (app_id, title, first_seen, last_seen, report_count)
+        SELECT CAST(app_id AS INTEGER), title, first_seen, last_seen, report_count
+        FROM games
+        WHERE app_id != '' AND app_id NOT GLOB '*[^0-9]*'
+        ''')
+        self.cursor.execute("DROP TABLE games")
+        self.cursor.execute("ALTER TABLE games_new RENAME TO games")
+        self.cursor.execute("COMMIT")
+        
+        logger.info(f"Migration finished in {time.time() - migrate_start_time:.2f} seconds")
+
+    def finalize(self):
+        """Build indexes and refresh planner statistics once ingestion is done."""
+        finalize_start_time = time.time()
+        
+        # Building the index once at the end is much cheaper than keeping it
+        # up to date on every insert
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_title ON games(title)')
+        # Lets case-insensitive prefix searches (LIKE 'abc%') use a range scan
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_title_nocase ON games(title COLLATE NOCASE)')
+        # Let the query script's "top N by column" listings walk an index and
+        # stop after N rows instead of sorting the whole table
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_report_count ON games(report_count DESC)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_first_seen ON games(first_seen DESC)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_last_seen ON games(last_seen DESC)')
+        self.create_search_index()
+        self.create_game_counter()
+        self.cursor.execute('ANALYZE')
+        
+        logger.info(f"Indexes built and statistics updated in {time.time() - finalize_start_time:.2f} seconds")
+
+    def create_search_index(self):
+        """Create the full-text title index on first run, if SQLite has FTS5."""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'games_fts'")
+        if self.cursor.fetchone():
+            return
+        
+        try:
+            self.cursor.execute("BEGIN")
+            for statement in CREATE_GAMES_FTS_SQL:
+                self.cursor.execute(statement)
+            self.cursor.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            if self.conn.in_transaction:
+                self.cursor.execute("ROLLBACK")
+            logger.warning(f"Could not create full-text search index, using a trigram table instead: {e}")
+            self.update_trigram_index()
+
+    def update_trigram_index(self):
+        """Add the trigrams of games not yet in game_trigrams.
+        
+        Titles never change once a game is stored, so only new games need
+        indexing.
+        """
+        self.cursor.execute(CREATE_GAME_TRIGRAMS_SQL)
+        new_games = self.conn.execute(
+            "SELECT app_id, title FROM games WHERE app_id NOT IN (SELECT app_id FROM game_trigrams)"
+        ).fetchall()
+        
+        self.cursor.execute("BEGIN")
+        try:
+            self.cursor.executemany(
+                "INSERT INTO game_trigrams (tri, app_id) VALUES (?, ?)",
+                ((tri, app_id) for app_id, title in new_games for tri in title_trigrams(title or ''))
+            )
+            self.cursor.execute("COMMIT")
+        except sqlite3.Error:
+            self.cursor.execute("ROLLBACK")
+            raise
+
+    def create_game_counter(self):
+        """Create the trigger-maintained game count on first run."""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'game_stats'")
+        if self.cursor.fetchone():
+            return
+        
+        self.cursor.execute("BEGIN")
+        for statement in CREATE_GAME_STATS_SQL:
+            self.cursor.execute(statement)
+        self.cursor.execute("COMMIT")
+
     def get_archive_files(self):
         """Get a list of all tar.gz files in the archive directory."""
         archives = sorted([f for f in self.archive_dir.glob("*.tar.gz")])
@@ -132,298 +601,93 @@ class ProtonDBExtractor:
         self.stats['processed_json_files'] = 0
         return json_files
 
-    def process_json_entry(self, entry_data, timestamp=None):
-        """Process a single JSON entry and add it to the database."""
-        try:
-            # Extract app info
-            app_info = entry_data.get("app", {})
-            steam_info = app_info.get("steam", {})
-            
-            app_id = steam_info.get("appId")
-            title = app_info.get("title")
-            
-            # Skip if missing essential data
-            if not app_id or not title:
-                return False, False
-            
-            # Use the entry's timestamp if available, otherwise use the provided one
-            entry_timestamp = entry_data.get("timestamp", timestamp)
-            
-            # Check if this game is already in our database
-            self.cursor.execute("SELECT app_id, first_seen, last_seen, report_count FROM games WHERE app_id = ?", (app_id,))
-            result = self.cursor.fetchone()
-            
-            is_new = False
-            is_updated = False
-            
-            if result:
-                # Game exists, update the record
-                _, first_seen, last_seen, report_count = result
-                
-                # Update first_seen if this entry is older
-                if entry_timestamp and entry_timestamp < first_seen:
-                    first_seen = entry_timestamp
-                    is_updated = True
-                
-                # Update last_seen if this entry is newer
-                if entry_timestamp and entry_timestamp > last_seen:
-                    last_seen = entry_timestamp
-                    is_updated = True
-                
-                self.cursor.execute(
-                    "UPDATE games SET first_seen = ?, last_seen = ?, report_count = report_count + 1 WHERE app_id = ?",
-                    (first_seen, last_seen, app_id)
-                )
-                is_updated = True
-            else:
-                # New game, insert it
-                self.cursor.execute(
-                    "INSERT INTO games (app_id, title, first_seen, last_seen, report_count) VALUES (?, ?, ?, ?, ?)",
-                    (app_id, title, entry_timestamp, entry_timestamp, 1)
-                )
-                is_new = True
-                
-            # Add to processed set to track unique games
-            self.processed_games.add(app_id)
-            return is_new, is_updated
-            
-        except Exception as e:
-            logger.error(f"Error processing entry: {e}")
-            return False, False
-
-    def process_archive(self, archive_path):
-        """Extract and process all JSON files from a tar.gz archive."""
-        archive_start_time = time.time()
-        logger.info(f"Processing archive: {archive_path}")
+    def write_games(self, games):
+        """Write aggregated (app_id, [title, first_seen, last_seen, count]) items in a single transaction.
         
-        entries_processed = 0
-        games_added = 0
+        Returns a tuple of (games added, games updated). As before, every
+        entry for a game that is already known counts as an update.
+        """
+        inserts = []
+        updates = []
         games_updated = 0
+        for app_id, (title, first_seen, last_seen, count) in games:
+            if app_id in self._known_ids:
+                updates.append((first_seen, last_seen, count, app_id))
+                games_updated += count
+            else:
+                inserts.append((app_id, title, first_seen, last_seen, count))
+                games_updated += count - 1
         
+        # The statements are module constants, so every batch reuses the
+        # prepared statements from the connection's statement cache
         try:
-            # Extract timestamp from filename (if possible)
-            # Format: reports_monthX_YYYY.tar.gz (where X can be a number and YYYY is the year)
-            filename = archive_path.name
-            archive_timestamp = None
-            
-            # Try to extract date from filename using regex
-            try:
-                # Pattern to match month names and extract year
-                pattern = r'reports_([a-z]+)(\d*)_(\d{4})\.tar\.gz'
-                match = re.match(pattern, filename)
-                
-                if match:
-                    month_name = match.group(1)  # e.g., 'jan', 'feb', etc.
-                    # year = match.group(3)  # e.g., '2019', '2020', etc.
-                    
-                    # Map abbreviated month names to their numerical values
-                    month_map = {
-                        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
-                        'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-                        'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-                    }
-                    
-                    if month_name in month_map:
-                        month_num = month_map[month_name]
-                        year = int(match.group(3))
-                        # Use the 15th day of the month as a default
-                        dt = datetime.datetime(year, month_num, 15)
-                        archive_timestamp = int(dt.timestamp())
-                        logger.info(f"Extracted timestamp from filename: {dt.strftime('%Y-%m-%d')} ({archive_timestamp})")
-                    else:
-                        logger.warning(f"Unknown month name in filename: {month_name}")
-                else:
-                    # Handle special files like reports_piiremoved.tar.gz
-                    # Use current time as a fallback
-                    if "piiremoved" in filename:
-                        archive_timestamp = int(time.time())
-                        logger.info(f"Using current timestamp for special file: {filename}")
-                    else:
-                        logger.warning(f"Filename does not match expected pattern: {filename}")
-            except Exception as e:
-                logger.warning(f"Could not extract timestamp from filename {filename}: {e}")
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extract archive to temporary directory
-                with tarfile.open(archive_path, "r:gz") as tar:
-                    members = tar.getmembers()
-                    logger.info(f"Found {len(members)} files in archive")
-                    tar.extractall(path=temp_dir)
-                
-                # Process all JSON files in the temporary directory
-                json_files = list(Path(temp_dir).glob("**/*.json"))
-                logger.info(f"Found {len(json_files)} JSON files to process")
-                
-                for json_file in tqdm(json_files, desc=f"Processing {archive_path.name}", unit="files"):
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                            # Handle both single entries and lists of entries
-                            if isinstance(data, list):
-                                for entry in data:
-                                    entries_processed += 1
-                                    is_new, is_updated = self.process_json_entry(entry, archive_timestamp)
-                                    if is_new:
-                                        games_added += 1
-                                    elif is_updated:
-                                        games_updated += 1
-                            else:
-                                entries_processed += 1
-                                is_new, is_updated = self.process_json_entry(data, archive_timestamp)
-                                if is_new:
-                                    games_added += 1
-                                elif is_updated:
-                                    games_updated += 1
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in file: {json_file}")
-                    except Exception as e:
-                        logger.error(f"Error processing file {json_file}: {e}")
-            
-            self.conn.commit()
-            
-            # Update statistics
-            self.stats['total_entries_processed'] += entries_processed
-            self.stats['total_games_added'] += games_added
+            self.cursor.execute("BEGIN")
+            self.cursor.executemany(INSERT_GAME_SQL, inserts)
+            self.cursor.executemany(UPDATE_GAME_SQL, updates)
+            self.cursor.execute("COMMIT")
+        except sqlite3.Error:
+            if self.conn.in_transaction:
+                self.cursor.execute("ROLLBACK")
+            raise
+        
+        # Only count the new games as known once they are stored. The known
+        # set and the counters change together so the stats thread never sees
+        # one without the other.
+        with self._stats_lock:
+            self._known_ids.update(row[0] for row in inserts)
+            self.stats['total_games_added'] += len(inserts)
             self.stats['total_games_updated'] += games_updated
-            self.stats['processed_archives'] += 1
-            
-            # Calculate processing time
-            archive_time = time.time() - archive_start_time
-            
-            # Get current database stats
-            self.cursor.execute("SELECT COUNT(*) FROM games")
-            current_game_count = self.cursor.fetchone()[0]
-            current_db_size = self.get_db_size()
-            
-            logger.info(f"Archive {archive_path.name} processed in {archive_time:.2f} seconds")
-            logger.info(f"  - Entries processed: {entries_processed}")
-            logger.info(f"  - Games added: {games_added}")
-            logger.info(f"  - Games updated: {games_updated}")
-            logger.info(f"  - Current games in database: {current_game_count}")
-            logger.info(f"  - Current database size: {current_db_size} MB")
-            
-            return entries_processed, games_added, games_updated
-            
-        except Exception as e:
-            logger.error(f"Error processing archive {archive_path}: {e}")
-            return 0, 0, 0
+        return len(inserts), games_updated
 
-    def process_json_file(self, json_path):
-        """Process a standalone JSON file (not in an archive)."""
-        file_start_time = time.time()
-        logger.info(f"Processing JSON file: {json_path}")
+    def store_reports(self, path, games, entries_processed, counter):
+        """Write the games read by read_reports() to the database in batches.
+        
+        counter names the statistic counting processed files of this kind.
+        Returns True once every game has been committed, False if the file
+        couldn't be read or writing it failed.
+        """
+        store_start_time = time.time()
+        
+        if games is None:
+            return False
         
-        entries_processed = 0
         games_added = 0
         games_updated = 0
         
+        # The file has been read in full, so its entries are processed
+        # before any of its games are written
+        with self._stats_lock:
+            self.stats['total_entries_processed'] += entries_processed
+        
         try:
-            # Extract timestamp from filename (if possible)
-            # Format: reports_monthX_YYYY.json (where X can be a number and YYYY is the year)
-            filename = json_path.name
-            file_timestamp = None
+            items = list(games.items())
+            for start in range(0, len(items), BATCH_SIZE):
+                added, updated = self.write_games(items[start:start + BATCH_SIZE])
+                games_added += added
+                games_updated += updated
             
-            # Try to extract date from filename using regex
-            try:
-                # Pattern to match month names and extract year
-                pattern = r'reports_([a-z]+)(\d*)_(\d{4})\.json'
-                match = re.match(pattern, filename)
-                
-                if match:
-                    month_name = match.group(1)  # e.g., 'jan', 'feb', etc.
-                    
-                    # Map abbreviated month names to their numerical values
-                    month_map = {
-                        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
-                        'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-                        'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-                    }
-                    
-                    if month_name in month_map:
-                        month_num = month_map[month_name]
-                        year = int(match.group(3))
-                        # Use the 15th day of the month as a default
-                        dt = datetime.datetime(year, month_num, 15)
-                        file_timestamp = int(dt.timestamp())
-                        logger.info(f"Extracted timestamp from filename: {dt.strftime('%Y-%m-%d')} ({file_timestamp})")
-                    else:
-                        logger.warning(f"Unknown month name in filename: {month_name}")
-                else:
-                    # Handle special files like reports_piiremoved.json
-                    # Use current time as a fallback
-                    if "piiremoved" in filename:
-                        file_timestamp = int(time.time())
-                        logger.info(f"Using current timestamp for special file: {filename}")
-                    else:
-                        logger.warning(f"Filename does not match expected pattern: {filename}")
-            except Exception as e:
-                logger.warning(f"Could not extract timestamp from filename {filename}: {e}")
-            
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # Handle both single entries and lists of entries
-                if isinstance(data, list):
-                    total_entries = len(data)
-                    logger.info(f"Found {total_entries} entries in {json_path.name}")
-                    
-                    for entry in tqdm(data, desc=f"Processing {json_path.name}", unit="entries"):
-                        entries_processed += 1
-                        is_new, is_updated = self.process_json_entry(entry, file_timestamp)
-                        if is_new:
-                            games_added += 1
-                        elif is_updated:
-                            games_updated += 1
-                        
-                        # Commit every 10,000 entries to avoid large transactions
-                        if entries_processed % 10000 == 0:
-                            self.conn.commit()
-                            logger.info(f"Processed {entries_processed}/{total_entries} entries from {json_path.name}")
-                else:
-                    entries_processed += 1
-                    is_new, is_updated = self.process_json_entry(data, file_timestamp)
-                    if is_new:
-                        games_added += 1
-                    elif is_updated:
-                        games_updated += 1
-            
-            self.conn.commit()
-            
-            # Update statistics
-            self.stats['total_entries_processed'] += entries_processed
-            self.stats['total_games_added'] += games_added
-            self.stats['total_games_updated'] += games_updated
-            self.stats['processed_json_files'] += 1
+            with self._stats_lock:
+                self.stats[counter] += 1
             
             # Calculate processing time
-            file_time = time.time() - file_start_time
+            store_time = time.time() - store_start_time
             
             # Get current database stats
-            self.cursor.execute("SELECT COUNT(*) FROM games")
-            current_game_count = self.cursor.fetchone()[0]
-            current_db_size = self.get_db_size()
+            current_game_count = len(self._known_ids)
+            current_db_size = self.get_db_size(max_age=DB_SIZE_MAX_AGE)
             
-            logger.info(f"JSON file {json_path.name} processed in {file_time:.2f} seconds")
+            logger.info(f"{path.name} written to database in {store_time:.2f} seconds")
             logger.info(f"  - Entries processed: {entries_processed}")
             logger.info(f"  - Games added: {games_added}")
             logger.info(f"  - Games updated: {games_updated}")
             logger.info(f"  - Current games in database: {current_game_count}")
             logger.info(f"  - Current database size: {current_db_size} MB")
             
-            # Remove the JSON file if requested
-            if self.remove_json:
-                try:
-                    logger.info(f"Removing processed JSON file: {json_path}")
-                    os.remove(json_path)
-                except Exception as e:
-                    logger.error(f"Error removing JSON file {json_path}: {e}")
-            
-            return entries_processed, games_added, games_updated
+            return True
             
         except Exception as e:
-            logger.error(f"Error processing JSON file {json_path}: {e}")
-            return 0, 0, 0
+            logger.error(f"Error processing {path}: {e}")
+            return False
 
     def run(self):
         """Run the extraction process for all archives."""
@@ -444,22 +708,48 @@ class ProtonDBExtractor:
             # Print initial stats
             self.print_stats("Initial Statistics")
             
-            # Process archives
-            for i, archive in enumerate(archives, 1):
-                logger.info(f"Processing archive {i}/{len(archives)}: {archive.name}")
-                entries, added, updated = self.process_archive(archive)
-                
-                # Print stats every 5 archives or at the end
-                if i % 5 == 0 or i == len(archives):
-                    self.print_stats(f"Statistics after processing {i}/{len(archives)} archives")
-            
-            # Process standalone JSON files
-            for i, json_file in enumerate(json_files, 1):
-                logger.info(f"Processing JSON file {i}/{len(json_files)}: {json_file.name}")
-                entries, added, updated = self.process_json_file(json_file)
+            # Process archives. Decompressing and parsing is CPU bound and
+            # independent per archive, so it runs in worker processes while
+            # this process owns the connection and does all the writes.
+            # Results come back in archive order, so the title kept for each
+            # game is the same as with a single process.
+            workers = min(self.workers, len(archives))
+            pool = multiprocessing.Pool(workers) if workers > 1 else None
+            
+            # Statistics are logged from a background thread, so the ingest
+            # loops never stop for them. It is started after the pool has
+            # forked its workers, so they can't inherit a lock it holds.
+            stop_stats = threading.Event()
+            stats_thread = threading.Thread(target=self.report_stats_periodically, args=(stop_stats,), daemon=True)
+            stats_thread.start()
+            try:
+                parsed_archives = pool.imap(read_reports, archives) if pool else map(read_reports, archives)
+                for i, (archive, games, entries_processed) in enumerate(parsed_archives, 1):
+                    logger.info(f"Processing archive {i}/{len(archives)}: {archive.name}")
+                    self.store_reports(archive, games, entries_processed, 'processed_archives')
                 
-                # Print stats after each JSON file
-                self.print_stats(f"Statistics after processing {i}/{len(json_files)} JSON files")
+                # Process standalone JSON files. There are only a few of them, so
+                # they are read here where their progress bar can be shown.
+                for i, json_file in enumerate(json_files, 1):
+                    logger.info(f"Processing JSON file {i}/{len(json_files)}: {json_file.name}")
+                    json_file, games, entries_processed = read_reports(json_file)
+                    stored = self.store_reports(json_file, games, entries_processed, 'processed_json_files')
+                    
+                    # Remove the JSON file if requested, but only once its
+                    # games are safely in the database
+                    if self.remove_json and stored:
+                        try:
+                            logger.info(f"Removing processed JSON file: {json_file}")
+                            os.remove(json_file)
+                        except Exception as e:
+                            logger.error(f"Error removing JSON file {json_file}: {e}")
+            finally:
+                stop_stats.set()
+                stats_thread.join()
+                if pool is not None:
+                    pool.terminate()
+            
+            self.finalize()
             
             # Calculate total processing time
             total_time = time.time() - self.start_time
@@ -479,8 +769,7 @@ class ProtonDBExtractor:
             logger.info(f"Total entries processed: {self.stats['total_entries_processed']}")
             
             # Get final database stats
-            self.cursor.execute("SELECT COUNT(*) FROM games")
-            final_game_count = self.cursor.fetchone()[0]
+            final_game_count = len(self._known_ids)
             logger.info(f"Total games in database: {final_game_count}")
             logger.info(f"New games added: {self.stats['total_games_added']}")
             logger.info(f"Existing games updated: {self.stats['total_games_updated']}")
@@ -504,6 +793,7 @@ def parse_arguments():
     parser.add_argument("--archive-dir", default="reports", help="Directory containing the archives (default: reports)")
     parser.add_argument("--db-path", default="protondb_games.db", help="Path to the SQLite database (default: protondb_games.db)")
     parser.add_argument("--remove-json", action="store_true", help="Remove JSON files after processing")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes used to read archives (default: number of CPUs)")
     return parser.parse_args()
 
 if __name__ == "__main__":
@@ -511,6 +801,7 @@ if __name__ == "__main__":
     extractor = ProtonDBExtractor(
         archive_dir=args.archive_dir,
         db_path=args.db_path,
-        remove_json=args.remove_json
+        remove_json=args.remove_json,
+        workers=args.workers
     )
     extractor.run() 
\ No newline at end of file
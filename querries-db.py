@@ -1,138 +1,544 @@
 #!/usr/bin/env python3
 import sqlite3
 import argparse
+import functools
+import itertools
+import hashlib
+import json
+import os
+import queue
+import random
+import re
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 
+# Settings applied to every connection the querier opens. The database is
+# only read here: journal_mode/synchronous are left to the extractor, which
+# already switched the file to WAL.
+READ_PRAGMAS = [
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA query_only=1",
+]
+
+
+def configure_read_connection(conn):
+    """Apply READ_PRAGMAS to a freshly opened connection."""
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+
+
+# Number of results each memoized query method keeps
+QUERY_CACHE_SIZE = 1024
+
+
+def memoized_query(method):
+    """Memoize a querier method on its arguments and the state of the database files.
+    
+    The key includes the modification time and size of the database and its
+    WAL, so results are reused only while the data they came from is
+    unchanged. Cached results are shared between calls and must not be
+    modified by callers.
+    """
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def cached(querier, db_version, args, kwargs):
+        return method(querier, *args, **dict(kwargs))
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return cached(self, self.db_version(), args, tuple(sorted(kwargs.items())))
+    
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+# LIKE only folds ASCII letters, so trigrams must be folded the same way the
+# extractor folded them when it built game_trigrams
+ASCII_LOWERCASE = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def pattern_trigrams(name_pattern):
+    """Return the 3-grams every title matching the LIKE pattern %name_pattern% must contain."""
+    trigrams = set()
+    # Wildcards can stand for anything, so only literal runs between them count
+    for literal in re.split('[%_]', name_pattern.translate(ASCII_LOWERCASE)):
+        trigrams.update(literal[i:i + 3] for i in range(len(literal) - 2))
+    return sorted(trigrams)
+
+
+# Where query results are cached between runs, and how many entries it may
+# hold. Entries are tiny, so each one costs a filesystem block whatever its
+# size, and the cap is on their number rather than their bytes.
+QUERY_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "protondb"
+QUERY_CACHE_MAX_ENTRIES = 2048
+# A cache write scans the whole directory for entries to evict about once
+# in this many writes, instead of every time
+QUERY_CACHE_SCAN_EVERY = 64
+
+
+def cache_hash(value):
+    """Return a short, stable hex digest of a JSON-serializable value."""
+    return hashlib.blake2b(json.dumps(value).encode(), digest_size=8).hexdigest()
+
+
+def to_plain(result):
+    """Convert rows in a query result to dicts so they can be stored as JSON."""
+    if isinstance(result, sqlite3.Row):
+        return dict(result)
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, sqlite3.Row) else row for row in result]
+    return result
+
+
+def disk_cached_query(method):
+    """Cache a querier method's results on disk, so later runs can skip the query.
+    
+    Entries are JSON files in the querier's cache_dir named
+    <database>-<version>-<query>.json, hashes of the database path, its
+    db_version(), and the method with its arguments. Rows are returned as
+    dicts, whether they come from the cache or the database.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache_dir is None:
+            return to_plain(method(self, *args, **kwargs))
+        
+        version = cache_hash(self.db_version())
+        query = cache_hash([method.__name__, args, sorted(kwargs.items())])
+        cache_file = self.cache_dir / f"{self.cache_prefix}-{version}-{query}.json"
+        
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                result = json.load(f)
+            # Mark the entry as recently used for eviction
+            os.utime(cache_file)
+            return result
+        except (OSError, ValueError):
+            pass
+        
+        result = to_plain(method(self, *args, **kwargs))
+        self.store_cached_result(cache_file, result, version)
+        return result
+    
+    return wrapper
+
+
+class ReadConnectionPool:
+    """A pool of read-only connections to one database.
+    
+    With WAL, readers don't block each other, so queries running in
+    different threads each get their own connection instead of taking turns
+    on a single one. Connections are opened on demand, up to size.
+    """
+    
+    def __init__(self, uri, size=None):
+        self.uri = uri
+        self.size = size or os.cpu_count() or 1
+        self._idle = queue.Queue()
+        self._connections = []
+        self._lock = threading.Lock()
+    
+    def _open(self):
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        configure_read_connection(conn)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        return conn
+    
+    @contextmanager
+    def acquire(self):
+        """Check out a connection for the duration of a with block."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                conn = self._open() if len(self._connections) < self.size else None
+                if conn is not None:
+                    self._connections.append(conn)
+            if conn is None:
+                # Every connection is in use, wait for one to come back
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+    
+    def close(self):
+        """Close every connection the pool opened."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._idle = queue.Queue()
+
+
 class ProtonDBQuerier:
     """Class to query the ProtonDB games database."""
     
-    def __init__(self, db_path="protondb_games.db"):
-        """Initialize the querier with path to database."""
-        self.db_path = Path(db_path)
-        self.conn = None
-        self.cursor = None
+    # Queries are built once here and passed verbatim on every call, so the
+    # connection's statement cache can hand back the prepared statement
+    COUNT_QUERY = "SELECT COUNT(*) FROM games"
+    # Kept up to date by triggers, so no table scan is needed
+    COUNTER_QUERY = "SELECT value FROM game_stats WHERE name = 'count'"
+    # Search conditions, each used for fetching the matches and counting them
+    SEARCH_CONDITION = "title LIKE ?"
+    # The trigram index answers LIKE itself, so a leading % no longer means
+    # scanning every title
+    SEARCH_INDEXED_CONDITION = "app_id IN (SELECT rowid FROM games_fts WHERE title LIKE ?)"
+    # Without FTS5, candidates are the titles containing every trigram of the
+    # pattern; LIKE then weeds out the ones where they aren't contiguous
+    SEARCH_TRIGRAM_CONDITION = (
+        "app_id IN (SELECT app_id FROM game_trigrams WHERE tri IN ({placeholders})"
+        " GROUP BY app_id HAVING COUNT(*) = ?) AND title LIKE ?"
+    )
+    # With a literal prefix, LIKE becomes a range scan over the NOCASE title index
+    SEARCH_PREFIX_CONDITION = "title LIKE ? ESCAPE '\\'"
+    APP_ID_QUERY = "SELECT * FROM games WHERE app_id = ?"
+    APP_IDS_QUERY = "SELECT * FROM games WHERE app_id IN ({placeholders})"
+    # Stay under the bound-parameter limit of older SQLite builds (999)
+    APP_IDS_BATCH_SIZE = 900
+    # Listings only read the columns display_games() shows
+    LIST_COLUMNS = "app_id, title, report_count"
+    MOST_REPORTED_QUERY = f"SELECT {LIST_COLUMNS} FROM games ORDER BY report_count DESC LIMIT ?"
+    RECENTLY_ADDED_QUERY = f"SELECT {LIST_COLUMNS} FROM games ORDER BY first_seen DESC LIMIT ?"
+    RECENTLY_UPDATED_QUERY = f"SELECT {LIST_COLUMNS} FROM games ORDER BY last_seen DESC LIMIT ?"
+    # All statistics in one pass over the table
+    STATS_QUERY = """
+        SELECT COUNT(*), MAX(report_count), printf('%.2f', AVG(report_count)), MIN(first_seen), MAX(first_seen)
+        FROM games
+    """
+    
+    def __init__(self, db_path="protondb_games.db", pool_size=None, cache_dir=QUERY_CACHE_DIR):
+        """Initialize the querier with path to database.
         
-        # Connect to the database
-        self._connect_to_db()
+        The database is only opened when a query first needs it, so results
+        served from the disk cache never touch SQLite. Pass cache_dir=None to
+        disable the on-disk result cache.
+        """
+        self.db_path = Path(db_path)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            # Identifies this database's entries among those of other databases
+            self.cache_prefix = cache_hash(str(self.db_path.resolve()))
+        self.pool_size = pool_size
+        self._pool = None
+        self._tables = None
+    
+    @property
+    def pool(self):
+        """The read-only connection pool, connecting on first use."""
+        if self._pool is None:
+            self._connect_to_db()
+        return self._pool
+    
+    @property
+    def has_search_index(self):
+        """Whether the database has the games_fts full-text index."""
+        return 'games_fts' in self._optional_tables()
+    
+    @property
+    def has_game_counter(self):
+        """Whether the database has the trigger-maintained game_stats count."""
+        return 'game_stats' in self._optional_tables()
+    
+    @property
+    def has_trigram_index(self):
+        """Whether the database has the game_trigrams fallback index."""
+        return 'game_trigrams' in self._optional_tables()
+    
+    def _optional_tables(self):
+        """Names of the optional tables the database has, connecting on first use."""
+        if self._tables is None:
+            self._connect_to_db()
+        return self._tables
     
     def _connect_to_db(self):
         """Connect to the SQLite database."""
         try:
+            # The querier never writes, so open the file read-only: it takes
+            # no write locks and can't modify the database by accident
+            pool = ReadConnectionPool(f"{self.db_path.resolve().as_uri()}?mode=ro", self.pool_size)
+            
+            # Databases built by older versions of the extractor lack these;
+            # ones built with an SQLite without FTS5 have game_trigrams
+            # instead of games_fts
+            with pool.acquire() as conn:
+                rows = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE name IN ('games_fts', 'game_stats', 'game_trigrams')"
+                )
+                self._tables = frozenset(row[0] for row in rows)
+            self._pool = pool
+            print(f"Connected to database: {self.db_path}")
+        except sqlite3.OperationalError as e:
+            # Opening read-only fails if the file is missing; only look for
+            # it once that has happened rather than on every run
             if not self.db_path.exists():
                 print(f"Error: Database file {self.db_path} does not exist.")
-                sys.exit(1)
-                
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row  # This enables column access by name
-            self.cursor = self.conn.cursor()
-            print(f"Connected to database: {self.db_path}")
+            else:
+                print(f"Database error: {e}")
+            sys.exit(1)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             sys.exit(1)
     
+    def db_version(self):
+        """Identify the current state of the database from its files' mtimes and sizes.
+        
+        An empty WAL holds no changes, so it counts as no WAL at all. The
+        first reader creates one, and that must not look like a new version.
+        """
+        version = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                version.append(None)
+                continue
+            version.append((st.st_mtime_ns, st.st_size) if st.st_size else None)
+        return tuple(version)
+    
+    def store_cached_result(self, cache_file, result, version):
+        """Write a result to the disk cache and keep the cache from growing without bound.
+        
+        The first write after the database changes removes this database's
+        entries for older versions, which can never be hit again. Once in a
+        while a write also evicts the least recently used entries past
+        QUERY_CACHE_MAX_ENTRIES.
+        """
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_file, cache_file)
+            
+            # The version the cache last saw for this database is kept in a
+            # marker file, so stale entries are looked for only when it changes
+            marker = self.cache_dir / f"{self.cache_prefix}.version"
+            try:
+                last_version = marker.read_text(encoding="utf-8")
+            except OSError:
+                last_version = None
+            if last_version != version:
+                marker.write_text(version, encoding="utf-8")
+                current = f"{self.cache_prefix}-{version}-"
+                for entry in self.cache_dir.glob(f"{self.cache_prefix}-*.json"):
+                    if not entry.name.startswith(current):
+                        self._remove_cache_entry(entry)
+            
+            if random.randrange(QUERY_CACHE_SCAN_EVERY) == 0:
+                self.evict_cached_results()
+        except OSError:
+            # The cache is only an optimization
+            pass
+    
+    def evict_cached_results(self):
+        """Remove the least recently used cache entries past QUERY_CACHE_MAX_ENTRIES."""
+        entries = []
+        for entry in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((entry.stat().st_mtime, entry))
+            except FileNotFoundError:
+                # Another run removed it
+                continue
+        
+        excess = len(entries) - QUERY_CACHE_MAX_ENTRIES
+        if excess > 0:
+            entries.sort(key=lambda item: item[0])
+            for _, entry in entries[:excess]:
+                self._remove_cache_entry(entry)
+    
+    @staticmethod
+    def _remove_cache_entry(entry):
+        """Delete a cache file that another run may already have removed."""
+        try:
+            entry.unlink()
+        except FileNotFoundError:
+            pass
+    
+    @memoized_query
+    @disk_cached_query
     def get_total_games_count(self):
         """Get the total count of games in the database."""
-        query = "SELECT COUNT(*) FROM games"
-        self.cursor.execute(query)
-        total_games = self.cursor.fetchone()[0]
-        return total_games
-    
-    def search_games_by_name(self, name_pattern):
-        """Search for games by name pattern."""
-        query = "SELECT * FROM games WHERE title LIKE ?"
-        self.cursor.execute(query, (f'%{name_pattern}%',))
-        games = self.cursor.fetchall()
-        return games
+        with self.pool.acquire() as conn:
+            query = self.COUNTER_QUERY if self.has_game_counter else self.COUNT_QUERY
+            return conn.execute(query).fetchone()[0]
+    
+    def _search_condition(self, name_pattern, prefix):
+        """Build the WHERE condition and its parameters for a name search."""
+        if prefix:
+            escaped = name_pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return self.SEARCH_PREFIX_CONDITION, (f'{escaped}%',)
+        
+        pattern = f'%{name_pattern}%'
+        if self.has_search_index:
+            return self.SEARCH_INDEXED_CONDITION, (pattern,)
+        
+        trigrams = pattern_trigrams(name_pattern) if self.has_trigram_index else []
+        if trigrams:
+            condition = self.SEARCH_TRIGRAM_CONDITION.format(placeholders=', '.join('?' * len(trigrams)))
+            return condition, (*trigrams, len(trigrams), pattern)
+        
+        # Patterns too short to have a trigram have to be checked against every title
+        return self.SEARCH_CONDITION, (pattern,)
     
+    def search_games_by_name(self, name_pattern, prefix=False):
+        """Search for games by name pattern.
+        
+        With prefix=True only titles starting with name_pattern match, and
+        name_pattern is taken literally rather than as a LIKE pattern.
+        Matches are yielded as they are read from the database instead of
+        being loaded all at once; the connection stays checked out until the
+        results are exhausted or the generator is closed.
+        """
+        condition, params = self._search_condition(name_pattern, prefix)
+        # Connect now rather than when the first row is read, so connection
+        # messages and errors come before any results are displayed
+        return self._iter_rows(self.pool, f"SELECT {self.LIST_COLUMNS} FROM games WHERE {condition}", params)
+    
+    @staticmethod
+    def _iter_rows(pool, query, params):
+        """Yield the rows of a query while holding a connection from pool."""
+        with pool.acquire() as conn:
+            yield from conn.execute(query, params)
+    
+    @memoized_query
+    @disk_cached_query
+    def count_games_by_name(self, name_pattern, prefix=False):
+        """Count the games search_games_by_name() would return."""
+        condition, params = self._search_condition(name_pattern, prefix)
+        with self.pool.acquire() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM games WHERE {condition}", params).fetchone()[0]
+    
+    @memoized_query
+    @disk_cached_query
     def get_game_by_app_id(self, app_id):
         """Get a game by its app_id."""
-        query = "SELECT * FROM games WHERE app_id = ?"
-        self.cursor.execute(query, (app_id,))
-        game = self.cursor.fetchone()
-        return game
+        with self.pool.acquire() as conn:
+            return conn.execute(self.APP_ID_QUERY, (app_id,)).fetchone()
+    
+    @memoized_query
+    @disk_cached_query
+    def get_games_by_app_ids(self, app_ids):
+        """Get the games with the given app_ids, in the order the ids were given.
+        
+        app_ids must be hashable, e.g. a tuple. Ids not in the database are
+        skipped.
+        """
+        games = {}
+        with self.pool.acquire() as conn:
+            for start in range(0, len(app_ids), self.APP_IDS_BATCH_SIZE):
+                batch = app_ids[start:start + self.APP_IDS_BATCH_SIZE]
+                query = self.APP_IDS_QUERY.format(placeholders=', '.join('?' * len(batch)))
+                for game in conn.execute(query, batch):
+                    games[game['app_id']] = game
+        return [games[app_id] for app_id in dict.fromkeys(app_ids) if app_id in games]
     
+    @memoized_query
+    @disk_cached_query
     def get_most_reported_games(self, limit=10):
         """Get games with the most reports."""
-        query = "SELECT * FROM games ORDER BY report_count DESC LIMIT ?"
-        self.cursor.execute(query, (limit,))
-        games = self.cursor.fetchall()
-        return games
+        with self.pool.acquire() as conn:
+            return conn.execute(self.MOST_REPORTED_QUERY, (limit,)).fetchall()
     
+    @memoized_query
+    @disk_cached_query
     def get_recently_added_games(self, limit=10):
         """Get the most recently added games."""
-        query = "SELECT * FROM games ORDER BY first_seen DESC LIMIT ?"
-        self.cursor.execute(query, (limit,))
-        games = self.cursor.fetchall()
-        return games
+        with self.pool.acquire() as conn:
+            return conn.execute(self.RECENTLY_ADDED_QUERY, (limit,)).fetchall()
     
+    @memoized_query
+    @disk_cached_query
     def get_recently_updated_games(self, limit=10):
         """Get the most recently updated games."""
-        query = "SELECT * FROM games ORDER BY last_seen DESC LIMIT ?"
-        self.cursor.execute(query, (limit,))
-        games = self.cursor.fetchall()
-        return games
+        with self.pool.acquire() as conn:
+            return conn.execute(self.RECENTLY_UPDATED_QUERY, (limit,)).fetchall()
     
+    @memoized_query
+    @disk_cached_query
     def get_database_stats(self):
         """Get various statistics about the database."""
-        stats = {}
+        with self.pool.acquire() as conn:
+            total_games, max_reports, avg_reports, oldest, newest = conn.execute(self.STATS_QUERY).fetchone()
         
-        # Total games
-        self.cursor.execute("SELECT COUNT(*) FROM games")
-        stats['total_games'] = self.cursor.fetchone()[0]
-        
-        # Games with most reports
-        self.cursor.execute("SELECT MAX(report_count) FROM games")
-        stats['max_reports'] = self.cursor.fetchone()[0]
-        
-        # Average reports per game
-        self.cursor.execute("SELECT AVG(report_count) FROM games")
-        stats['avg_reports'] = round(self.cursor.fetchone()[0], 2)
-        
-        # Oldest and newest game (by first_seen)
-        self.cursor.execute("SELECT MIN(first_seen), MAX(first_seen) FROM games")
-        min_max = self.cursor.fetchone()
-        stats['oldest_game_timestamp'] = min_max[0]
-        stats['newest_game_timestamp'] = min_max[1]
-        
-        return stats
+        return {
+            'total_games': total_games,
+            'max_reports': max_reports,  # Games with most reports
+            'avg_reports': avg_reports,  # Average reports per game, formatted to 2 decimals
+            # Oldest and newest game (by first_seen)
+            'oldest_game_timestamp': oldest,
+            'newest_game_timestamp': newest,
+        }
     
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
+        """Close the database connections."""
+        if self._pool:
+            self._pool.close()
             print("Database connection closed.")
 
 
-def display_games(games, show_all_fields=False):
-    """Display games in a formatted way."""
-    if not games:
-        print("No games found.")
-        return
+# Rows formatted per write to stdout when displaying games
+DISPLAY_BATCH_SIZE = 1000
+
+
+def write_lines(lines):
+    """Write lines to stdout in large batches rather than one print() per line.
+    
+    Lines are consumed lazily, so a streamed result is never held in memory
+    all at once.
+    """
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, DISPLAY_BATCH_SIZE))
+        if not batch:
+            return
+        batch.append('')
+        sys.stdout.write("\n".join(batch))
+
+
+def display_games(games, show_all_fields=False, count=None):
+    """Display games in a formatted way.
     
-    if isinstance(games, sqlite3.Row):
+    games may be any iterable of rows, such as a cursor, if their count is
+    passed separately.
+    """
+    if isinstance(games, (sqlite3.Row, dict)):
         games = [games]  # Convert single game to list
     
+    if count is None:
+        count = len(games) if games else 0
+    if not count:
+        print("No games found.")
+        return
+    
     if show_all_fields:
         # Print all fields
-        for game in games:
-            print("\n" + "=" * 50)
-            for key in game.keys():
-                print(f"{key}: {game[key]}")
+        write_lines(
+            "\n" + "=" * 50 + "\n" + "\n".join(f"{key}: {game[key]}" for key in game.keys())
+            for game in games
+        )
     else:
         # Print simplified view
-        print(f"\nFound {len(games)} games:")
+        print(f"\nFound {count} games:")
         print("-" * 80)
         print(f"{'App ID':<10} | {'Title':<50} | {'Reports':<10}")
         print("-" * 80)
-        for game in games:
-            print(f"{game['app_id']:<10} | {game['title'][:48]:<50} | {game['report_count']:<10}")
+        write_lines(
+            f"{game['app_id']:<10} | {game['title'][:48]:<50} | {game['report_count']:<10}"
+            for game in games
+        )
 
 
 def main():
     parser = argparse.ArgumentParser(description="Query the ProtonDB games database.")
     parser.add_argument("--db", default="protondb_games.db", help="Path to the database file")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the on-disk query result cache")
     
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
@@ -142,10 +548,11 @@ def main():
     # Search command
     search_parser = subparsers.add_parser("search", help="Search for games by name")
     search_parser.add_argument("pattern", help="Name pattern to search for")
+    search_parser.add_argument("--prefix", action="store_true", help="Only match titles starting with the pattern")
     
     # Get by app_id command
-    app_parser = subparsers.add_parser("app", help="Get game by app_id")
-    app_parser.add_argument("app_id", help="Steam app ID")
+    app_parser = subparsers.add_parser("app", help="Get games by app_id")
+    app_parser.add_argument("app_ids", nargs="+", type=int, help="Steam app IDs")
     
     # Most reported games command
     most_reported_parser = subparsers.add_parser("most-reported", help="Get games with most reports")
@@ -166,7 +573,7 @@ def main():
     args = parser.parse_args()
     
     # Create querier
-    querier = ProtonDBQuerier(args.db)
+    querier = ProtonDBQuerier(args.db, cache_dir=None if args.no_cache else QUERY_CACHE_DIR)
     
     try:
         if args.command == "count":
@@ -174,12 +581,13 @@ def main():
             print(f"Total games in database: {count}")
         
         elif args.command == "search":
-            games = querier.search_games_by_name(args.pattern)
-            display_games(games)
+            count = querier.count_games_by_name(args.pattern, prefix=args.prefix)
+            games = querier.search_games_by_name(args.pattern, prefix=args.prefix)
+            display_games(games, count=count)
         
         elif args.command == "app":
-            game = querier.get_game_by_app_id(args.app_id)
-            display_games(game, show_all_fields=True)
+            games = querier.get_games_by_app_ids(tuple(args.app_ids))
+            display_games(games, show_all_fields=True)
         
         elif args.command == "most-reported":
             games = querier.get_most_reported_games(args.limit)